@@ -1,30 +1,93 @@
 import asyncio
-import datetime as dt
-import json
 import os
 import pathlib
-from collections.abc import AsyncIterator
-from contextlib import asynccontextmanager
-from dataclasses import dataclass
-from typing import Optional
+import queue
+import re
+import shlex
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional, TypeVar
 
-import asyncssh
 from mcp.server.fastmcp import Context, FastMCP
 from mcp.server.session import ServerSession
 
+# asyncssh pulls in cryptography and is slow to import, so it is imported where it
+# is first needed (connect_ssh) and annotations that mention it are strings
+if TYPE_CHECKING:
+    import asyncssh
+
+# orjson is an optional speedup for metadata (de)serialisation
+try:
+    import orjson
+
+    def _json_loads(data: bytes) -> dict:
+        return orjson.loads(data)
+
+    def _json_dumps(obj: dict) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+except ImportError:
+    import json
+
+    def _json_loads(data: bytes) -> dict:
+        return json.loads(data)
+
+    def _json_dumps(obj: dict) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+
 # ---------- Config ----------
 VM_HOST = os.getenv("VM_HOST", "192.168.122.79")
 VM_USER = os.getenv("VM_USER", "vmrobot")
 VM_PORT = int(os.getenv("VM_PORT", "22"))
 VM_DISPLAY = os.getenv("VM_DISPLAY", ":0")
 VM_IDENTITY = os.getenv("VM_IDENTITY", "")  # path to private key, optional
+SFTP_MAX_CONCURRENT = 8  # parallel transfers in ssh_upload_many/ssh_download_many
+
+# Prefix shared by every xdotool command, built once from the config
+_XDO_PREFIX = f"DISPLAY={VM_DISPLAY} xdotool "
+# xdotool button numbers and mousemove subcommands by tool argument
+_BUTTON_MAP = {"left": 1, "middle": 2, "right": 3}
+_MOUSE_MODE = {"absolute": "mousemove --sync", "relative": "mousemove_relative --sync"}
 
 PROJECTS_DIR = pathlib.Path("data/projects")
 PROJECTS_DIR.mkdir(parents=True, exist_ok=True)
+LOG_FLUSH_INTERVAL = 0.1  # seconds between batched project log writes
 
 
 # ---------- Project Management ----------
 
+# strftime format -> (epoch second, formatted string) of the last call
+_timestamp_cache: dict[str, tuple[int, str]] = {}
+
+
+def _utc_timestamp(fmt: str, sec: int | None = None) -> str:
+    """Format a UTC time with strftime, reusing the result within one second."""
+    if sec is None:
+        sec = int(time.time())
+    cached = _timestamp_cache.get(fmt)
+    if cached is not None and cached[0] == sec:
+        return cached[1]
+    formatted = time.strftime(fmt, time.gmtime(sec))
+    _timestamp_cache[fmt] = (sec, formatted)
+    return formatted
+
+
+# Characters not allowed in advice filenames (\w matches what str.isalnum does, plus _)
+_UNSAFE_TITLE_RE = re.compile(r"[^\w\- ]")
+
+
+def _count_entries(directory: pathlib.Path, suffix: str = "") -> int:
+    """Count entries in a directory, optionally by name suffix."""
+    try:
+        with os.scandir(directory) as it:
+            return sum(1 for e in it if e.name.endswith(suffix))
+    except FileNotFoundError:
+        return 0
+
 
 @dataclass
 class Project:
@@ -34,19 +97,25 @@ class Project:
     path: pathlib.Path
     created_at: str
     description: str = ""
+    _log_queue: queue.SimpleQueue[str] = field(
+        default_factory=queue.SimpleQueue, init=False, repr=False, compare=False
+    )
+    _log_write_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+    _log_writer: Optional[asyncio.Task] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @classmethod
     def create(cls, name: str, description: str = "") -> "Project":
         """Create a new project with folder structure."""
-        timestamp = dt.datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        timestamp = _utc_timestamp("%Y%m%d-%H%M%S")
         project_path = PROJECTS_DIR / f"{timestamp}_{name}"
 
-        # Create folder structure
-        project_path.mkdir(parents=True, exist_ok=True)
-        (project_path / "screenshots").mkdir(exist_ok=True)
-        (project_path / "logs").mkdir(exist_ok=True)
-        (project_path / "results").mkdir(exist_ok=True)
-        (project_path / "advice").mkdir(exist_ok=True)
+        # Create folder structure (makedirs also creates the project folder)
+        for sub in ("screenshots", "logs", "results", "advice"):
+            os.makedirs(os.path.join(project_path, sub), exist_ok=True)
 
         project = cls(
             name=name,
@@ -65,8 +134,8 @@ class Project:
         if not metadata_file.exists():
             raise FileNotFoundError(f"No metadata.json in {project_path}")
 
-        with open(metadata_file) as f:
-            data = json.load(f)
+        with open(metadata_file, "rb") as f:
+            data = _json_loads(f.read())
 
         return cls(
             name=data["name"],
@@ -82,16 +151,51 @@ class Project:
             "created_at": self.created_at,
             "description": self.description,
         }
-        with open(self.path / "metadata.json", "w") as f:
-            json.dump(metadata, f, indent=2)
+        with open(self.path / "metadata.json", "wb") as f:
+            f.write(_json_dumps(metadata))
 
     def _log(self, message: str, level: str = "INFO") -> None:
-        """Append a log entry to the project log file."""
-        timestamp = dt.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-        log_line = f"[{timestamp}] [{level}] {message}\n"
-        log_file = self.path / "logs" / "project.log"
-        with open(log_file, "a") as f:
-            f.write(log_line)
+        """Queue a log entry; it is written by the next flush_logs()."""
+        timestamp = _utc_timestamp("%Y-%m-%d %H:%M:%S")
+        self._log_queue.put_nowait(f"[{timestamp}] [{level}] {message}\n")
+
+    def flush_logs(self) -> None:
+        """Append all queued log entries to the project log file in one write."""
+        with self._log_write_lock:
+            lines = []
+            while True:
+                try:
+                    lines.append(self._log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if lines:
+                with open(self.path / "logs" / "project.log", "a") as f:
+                    f.write("".join(lines))
+
+    async def _run_log_writer(self) -> None:
+        """Periodically flush queued log entries off the event loop."""
+        while True:
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            if not self._log_queue.empty():
+                try:
+                    await asyncio.to_thread(self.flush_logs)
+                except OSError:
+                    # Keep draining; the entries of the failed write are lost
+                    continue
+
+    def start_log_writer(self) -> None:
+        """Start the background log writer (must be called from the event loop)."""
+        if self._log_writer is None:
+            self._log_writer = asyncio.create_task(self._run_log_writer())
+
+    async def close(self) -> None:
+        """Stop the background log writer and write any remaining entries."""
+        if self._log_writer is not None:
+            writer, self._log_writer = self._log_writer, None
+            writer.cancel()
+            with suppress(asyncio.CancelledError):
+                await writer
+        await asyncio.to_thread(self.flush_logs)
 
     def log(self, message: str, level: str = "INFO") -> str:
         """Public logging method."""
@@ -113,9 +217,8 @@ class Project:
     def save_advice(self, title: str, content: str) -> pathlib.Path:
         """Save an advice/tip for future LLM sessions."""
         # Create a safe filename from title
-        safe_title = "".join(c if c.isalnum() or c in "- _" else "_" for c in title)
-        safe_title = safe_title[:50]  # Limit length
-        timestamp = dt.datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        safe_title = _UNSAFE_TITLE_RE.sub("_", title)[:50]  # Limit length
+        timestamp = _utc_timestamp("%Y%m%d-%H%M%S")
         filename = f"{timestamp}_{safe_title}.md"
 
         advice_path = self.path / "advice" / filename
@@ -130,26 +233,34 @@ class Project:
         if not advice_dir.exists():
             return []
 
+        with os.scandir(advice_dir) as it:
+            entries = sorted(
+                (e for e in it if e.name.endswith(".md") and e.is_file()),
+                key=lambda e: e.name,
+            )
+
         advice_list = []
-        for advice_file in sorted(advice_dir.glob("*.md")):
-            content = advice_file.read_text()
-            # Extract title from first line (# Title format)
-            lines = content.strip().split("\n")
-            title = lines[0].lstrip("# ").strip() if lines else advice_file.stem
-            body = "\n".join(lines[2:]).strip() if len(lines) > 2 else ""
+        for entry in entries:
+            with open(entry.path) as f:
+                content = f.read()
+            # Extract title from first line (# Title format); body follows a blank line
+            lines = content.strip().split("\n", 2)
+            title = lines[0].lstrip("# ").strip()
+            body = lines[2].strip() if len(lines) > 2 else ""
             advice_list.append(
                 {
                     "title": title,
                     "content": body,
-                    "file": advice_file.name,
+                    "file": entry.name,
                 }
             )
         return advice_list
 
     def get_info(self) -> dict:
         """Get project information and statistics."""
-        screenshots = list((self.path / "screenshots").glob("*.png"))
-        results = list((self.path / "results").glob("*"))
+        self.flush_logs()
+        screenshot_count = _count_entries(self.path / "screenshots", ".png")
+        result_count = _count_entries(self.path / "results")
         log_file = self.path / "logs" / "project.log"
         log_lines = log_file.read_text().count("\n") if log_file.exists() else 0
 
@@ -158,8 +269,8 @@ class Project:
             "path": str(self.path),
             "created_at": self.created_at,
             "description": self.description,
-            "screenshot_count": len(screenshots),
-            "result_count": len(results),
+            "screenshot_count": screenshot_count,
+            "result_count": result_count,
             "log_entries": log_lines,
         }
 
@@ -169,40 +280,142 @@ class Project:
 
 @dataclass
 class AppContext:
-    ssh: asyncssh.SSHClientConnection
+    ssh: "asyncssh.SSHClientConnection"
+    sftp: "asyncssh.SFTPClient"
     project: Optional[Project] = None
+    _reconnect_lock: asyncio.Lock = field(
+        default_factory=asyncio.Lock, init=False, repr=False, compare=False
+    )
 
+    async def reopen_sftp(self, failed: "asyncssh.SFTPClient") -> "asyncssh.SFTPClient":
+        """
+        Replace a dead SFTP session and return the current client.
+
+        If the whole connection closed, it is re-established (which also opens
+        a new SFTP session); otherwise a new session is started on it. Concurrent
+        callers holding the same failed client trigger only one replacement.
+        """
+        if self.ssh.is_closed():
+            await self.reconnect(self.ssh)
+            return self.sftp
+        async with self._reconnect_lock:
+            if self.sftp is failed:  # not yet replaced by a concurrent transfer
+                failed.exit()
+                self.sftp = await self.ssh.start_sftp_client()
+        return self.sftp
+
+    async def reconnect(self, failed: "asyncssh.SSHClientConnection") -> None:
+        """Replace a dead SSH connection and its SFTP client with fresh ones."""
+        async with self._reconnect_lock:
+            if self.ssh is not failed:
+                return  # another tool already reconnected
+            failed.close()
+            self.ssh = await connect_ssh()
+            self.sftp = await self.ssh.start_sftp_client()
+
+
+async def connect_ssh(
+    options: Optional["asyncssh.SSHClientConnectionOptions"] = None,
+) -> "asyncssh.SSHClientConnection":
+    import asyncssh
 
-async def connect_ssh() -> asyncssh.SSHClientConnection:
     kwargs = dict(
         host=VM_HOST,
         port=VM_PORT,
         username=VM_USER,
         known_hosts=None,
+        # Detect dead connections (VM reboot, NAT timeout) within ~90s
+        keepalive_interval=30,
+        keepalive_count_max=3,
     )
     if VM_IDENTITY:
         kwargs["client_keys"] = [VM_IDENTITY]
 
-    return await asyncssh.connect(**kwargs)
+    # Prebuilt options serve as defaults; the settings above take precedence
+    return await asyncssh.connect(options=options, **kwargs)
 
 
-async def run_vm_cmd(ssh: asyncssh.SSHClientConnection, cmd: str) -> str:
+async def run_ssh(
+    app_ctx: AppContext, cmd: str, **kwargs: object
+) -> "asyncssh.SSHCompletedProcess":
+    """
+    Run a command on the VM over the shared connection.
+
+    If the connection is already closed no channel can be opened and the command
+    never ran, so the connection is re-established and the command retried once.
+    If the connection drops while the command runs it is re-established for
+    later calls, but the error is raised rather than risk running it twice.
+    """
+    import asyncssh
+
+    ssh = app_ctx.ssh
+    try:
+        return await ssh.run(cmd, **kwargs)
+    except asyncssh.ChannelOpenError:
+        if not ssh.is_closed():
+            raise
+        await app_ctx.reconnect(ssh)
+        return await app_ctx.ssh.run(cmd, **kwargs)
+    except asyncssh.DisconnectError:
+        await app_ctx.reconnect(ssh)
+        raise
+
+
+async def run_vm_cmd(app_ctx: AppContext, cmd: str) -> str:
     """Run a command inside the VM and return stdout."""
-    result = await ssh.run(cmd, check=True)
+    result = await run_ssh(app_ctx, cmd, check=True)
     return result.stdout.strip()
 
 
+T = TypeVar("T")
+
+
+async def run_sftp(
+    app_ctx: AppContext, op: Callable[["asyncssh.SFTPClient"], Awaitable[T]]
+) -> T:
+    """Run an operation on the shared SFTP client, reopening it once if it died."""
+    import asyncssh
+
+    sftp = app_ctx.sftp
+    try:
+        return await op(sftp)
+    # NoConnection: the session or its connection was already closed;
+    # ConnectionLost: it closed while the operation was in flight
+    except (asyncssh.SFTPNoConnection, asyncssh.SFTPConnectionLost):
+        return await op(await app_ctx.reopen_sftp(sftp))
+
+
+async def gather_limited(
+    aws: list[Awaitable[T]], limit: int
+) -> list[T | BaseException]:
+    """Await concurrently, at most limit at a time; errors are returned, not raised."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=True)
+
+
 # ---------- MCP server setup ----------
 
 
 @asynccontextmanager
 async def lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
     ssh = await connect_ssh()
+    sftp = await ssh.start_sftp_client()
+    app_ctx = AppContext(ssh=ssh, sftp=sftp)
     try:
-        yield AppContext(ssh=ssh)
+        yield app_ctx
     finally:
-        ssh.close()
-        await ssh.wait_closed()
+        try:
+            if app_ctx.project is not None:
+                await app_ctx.project.close()
+        finally:
+            app_ctx.sftp.exit()
+            app_ctx.ssh.close()
+            await app_ctx.ssh.wait_closed()
 
 
 mcp = FastMCP("QemuVMControl", lifespan=lifespan)
@@ -229,15 +442,12 @@ async def move_mouse(
     especially in nested environments (Citrix, VMs). Mouse movements work but
     keyboard navigation is more consistent.
     """
-    ssh = ctx.request_context.lifespan_context.ssh  # type: ignore[union-attr]
-    if mode == "absolute":
-        cmd = f"DISPLAY={VM_DISPLAY} xdotool mousemove --sync {x} {y}"
-    elif mode == "relative":
-        cmd = f"DISPLAY={VM_DISPLAY} xdotool mousemove_relative --sync {x} {y}"
-    else:
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
+    if mode not in _MOUSE_MODE:
         raise ValueError("mode must be 'absolute' or 'relative'")
 
-    await run_vm_cmd(ssh, cmd)
+    cmd = _XDO_PREFIX + f"{_MOUSE_MODE[mode]} {x} {y}"
+    await run_vm_cmd(app_ctx, cmd)
     result = f"Mouse moved to ({x}, {y}) [{mode}]"
     _log_tool_call(ctx, "move_mouse", {"x": x, "y": y, "mode": mode})
     return result
@@ -261,13 +471,12 @@ async def click(
     like Ctrl+Shift+P to explicitly switch focus instead. Always verify with
     take_screenshot() before typing after a click.
     """
-    ssh = ctx.request_context.lifespan_context.ssh  # type: ignore[union-attr]
-    button_map = {"left": 1, "middle": 2, "right": 3}
-    if button not in button_map:
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
+    if button not in _BUTTON_MAP:
         raise ValueError("button must be left/middle/right")
 
-    cmd = f"DISPLAY={VM_DISPLAY} xdotool click --repeat {count} {button_map[button]}"
-    await run_vm_cmd(ssh, cmd)
+    cmd = _XDO_PREFIX + f"click --repeat {count} {_BUTTON_MAP[button]}"
+    await run_vm_cmd(app_ctx, cmd)
     result = f"Clicked {button} x{count}"
     _log_tool_call(ctx, "click", {"button": button, "count": count})
     return result
@@ -290,11 +499,10 @@ async def type_text(
 
     The text is typed with 10ms delay between characters for reliability.
     """
-    ssh = ctx.request_context.lifespan_context.ssh  # type: ignore[union-attr]
-    # naive escaping; good enough for now
-    escaped = text.replace('"', r"\"")
-    cmd = f'DISPLAY={VM_DISPLAY} xdotool type --delay 10 "{escaped}"'
-    await run_vm_cmd(ssh, cmd)
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
+    # Text is fed on stdin, so no shell escaping is needed
+    cmd = _XDO_PREFIX + "type --delay 10 --file -"
+    await run_ssh(app_ctx, cmd, check=True, input=text)
     # Mask sensitive text in logs (only show length)
     log_text = text if len(text) <= 20 else f"{text[:10]}...({len(text)} chars)"
     _log_tool_call(ctx, "type_text", {"text": log_text})
@@ -318,11 +526,11 @@ async def press_keys(
 
     Always follow with wait() and take_screenshot() to verify the action completed.
     """
-    ssh = ctx.request_context.lifespan_context.ssh  # type: ignore[union-attr]
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
     # xdotool uses 'ctrl+l', 'alt+F4', etc.
     combo = "+".join(k.lower() for k in keys)
-    cmd = f"DISPLAY={VM_DISPLAY} xdotool key {combo}"
-    await run_vm_cmd(ssh, cmd)
+    cmd = _XDO_PREFIX + "key " + combo
+    await run_vm_cmd(app_ctx, cmd)
     result = f"Pressed keys: {keys}"
     _log_tool_call(ctx, "press_keys", {"keys": keys})
     return result
@@ -366,6 +574,7 @@ async def run_actions(
     - Critical for high-latency environments
     - Ensures sequential execution, stops on first error
     - Actions execute reliably in order
+    - Consecutive non-wait actions are sent to the VM as a single SSH command
 
     Each action is a dict with "action" key and action-specific parameters.
 
@@ -389,46 +598,77 @@ async def run_actions(
     Returns:
         Summary of executed actions
     """
-    ssh = ctx.request_context.lifespan_context.ssh  # type: ignore[union-attr]
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
     results = []
 
+    # xdotool invocations are queued and sent as a single SSH exec; the queue
+    # is only flushed before a wait (which must sleep locally) and at the end.
+    # Entries are (action number, action type, result line, command or None).
+    pending: list[tuple[int, str, str, Optional[str]]] = []
+
+    async def flush() -> Optional[tuple[int, str, str]]:
+        """Run queued actions; return (number, action, message) of a failed one."""
+        batch = pending.copy()
+        pending.clear()
+        # Each command echoes its action number once it has succeeded
+        script = " && ".join(
+            f"{cmd} && echo {num}" for num, _, _, cmd in batch if cmd is not None
+        )
+        try:
+            if script:
+                await run_vm_cmd(app_ctx, script)
+        except Exception as e:
+            stdout = getattr(e, "stdout", None)
+            done = [int(w) for w in stdout.split() if w.isdigit()] if stdout else []
+            last_done = done[-1] if done else 0
+            for num, action_type, line, cmd in batch:
+                if cmd is not None and num > last_done:
+                    return num, action_type, str(e)
+                results.append(line)
+        results.extend(line for _, _, line, _ in batch)
+        return None
+
+    error: Optional[tuple[int, str, str]] = None
     for i, action_def in enumerate(actions):
         action_type = action_def.get("action")
 
+        if action_type == "wait":
+            error = await flush()
+            if error is not None:
+                break
+
         try:
             if action_type == "press_keys":
                 keys = action_def.get("keys", [])
                 combo = "+".join(k.lower() for k in keys)
-                cmd = f"DISPLAY={VM_DISPLAY} xdotool key {combo}"
-                await run_vm_cmd(ssh, cmd)
-                results.append(f"{i + 1}. press_keys {keys}")
+                cmd = _XDO_PREFIX + "key " + combo
+                pending.append((i + 1, action_type, f"{i + 1}. press_keys {keys}", cmd))
 
             elif action_type == "type_text":
                 text = action_def.get("text", "")
-                escaped = text.replace('"', r"\"")
-                cmd = f'DISPLAY={VM_DISPLAY} xdotool type --delay 10 "{escaped}"'
-                await run_vm_cmd(ssh, cmd)
-                results.append(f"{i + 1}. type_text ({len(text)} chars)")
+                cmd = _XDO_PREFIX + "type --delay 10 " + shlex.quote(text)
+                line = f"{i + 1}. type_text ({len(text)} chars)"
+                pending.append((i + 1, action_type, line, cmd))
 
             elif action_type == "click":
                 button = action_def.get("button", "left")
                 count = action_def.get("count", 1)
-                button_map = {"left": 1, "middle": 2, "right": 3}
-                btn_num = button_map.get(button, 1)
-                cmd = f"DISPLAY={VM_DISPLAY} xdotool click --repeat {count} {btn_num}"
-                await run_vm_cmd(ssh, cmd)
-                results.append(f"{i + 1}. click {button} x{count}")
+                if button not in _BUTTON_MAP:
+                    raise ValueError("button must be left/middle/right")
+                btn_num = _BUTTON_MAP[button]
+                cmd = _XDO_PREFIX + f"click --repeat {count} {btn_num}"
+                line = f"{i + 1}. click {button} x{count}"
+                pending.append((i + 1, action_type, line, cmd))
 
             elif action_type == "move_mouse":
                 x = action_def.get("x", 0)
                 y = action_def.get("y", 0)
                 mode = action_def.get("mode", "absolute")
-                if mode == "absolute":
-                    cmd = f"DISPLAY={VM_DISPLAY} xdotool mousemove --sync {x} {y}"
-                else:
-                    cmd = f"DISPLAY={VM_DISPLAY} xdotool mousemove_relative --sync {x} {y}"
-                await run_vm_cmd(ssh, cmd)
-                results.append(f"{i + 1}. move_mouse ({x}, {y}) [{mode}]")
+                if mode not in _MOUSE_MODE:
+                    raise ValueError("mode must be 'absolute' or 'relative'")
+                cmd = _XDO_PREFIX + f"{_MOUSE_MODE[mode]} {x} {y}"
+                line = f"{i + 1}. move_mouse ({x}, {y}) [{mode}]"
+                pending.append((i + 1, action_type, line, cmd))
 
             elif action_type == "wait":
                 seconds = action_def.get("seconds", 0.5)
@@ -436,13 +676,23 @@ async def run_actions(
                 results.append(f"{i + 1}. wait {seconds}s")
 
             else:
-                results.append(f"{i + 1}. UNKNOWN ACTION: {action_type}")
+                line = f"{i + 1}. UNKNOWN ACTION: {action_type}"
+                pending.append((i + 1, action_type, line, None))
 
         except Exception as e:
-            results.append(f"{i + 1}. ERROR in {action_type}: {str(e)}")
-            _log_error(ctx, "run_actions", f"Action {i + 1} ({action_type}): {str(e)}")
+            error = (i + 1, action_type, str(e))
             break  # Stop on error
 
+    # Actions queued before an invalid one still run, as they did unbatched; if
+    # one of them fails, it is the first error and the one reported
+    batch_error = await flush()
+    if batch_error is not None:
+        error = batch_error
+    if error is not None:
+        num, action_type, message = error
+        results.append(f"{num}. ERROR in {action_type}: {message}")
+        _log_error(ctx, "run_actions", f"Action {num} ({action_type}): {message}")
+
     _log_tool_call(
         ctx, "run_actions", {"count": len(actions)}, f"executed {len(results)} actions"
     )
@@ -492,10 +742,10 @@ async def ssh_execute(
         - Install packages: "sudo pacman -Sy package-name"
         - Check processes: "ps aux | head -20"
     """
-    ssh = ctx.request_context.lifespan_context.ssh  # type: ignore[union-attr]
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
 
     try:
-        result = await ssh.run(command, check=False)
+        result = await run_ssh(app_ctx, command, check=False)
         output_parts = []
 
         if result.stdout:
@@ -539,7 +789,7 @@ async def ssh_upload(
     files must be transferred to inner layers using alternative methods.
 
     Notes:
-    - Uses SFTP over the persistent SSH connection
+    - Reuses a persistent SFTP session over the SSH connection
     - Destination directory must exist (create with ssh_execute if needed)
     - Use absolute paths for reliability
     - Supports all file types (text, binary, archives)
@@ -548,7 +798,7 @@ async def ssh_upload(
     - Verify local file exists before uploading
     - Create destination directory first: ssh_execute("mkdir -p /path/to/dir")
     - For scripts, set permissions after upload: ssh_execute("chmod +x /path/to/script.sh")
-    - Use tar/zip for multiple files
+    - For multiple files use ssh_upload_many (or tar/zip for whole directories)
 
     Args:
         local_path: Path to the local file to upload (absolute or relative)
@@ -561,7 +811,7 @@ async def ssh_upload(
         - Upload config: local_path="./config.json", remote_path="/home/vmrobot/config.json"
         - Upload script: local_path="./deploy.sh", remote_path="/home/vmrobot/deploy.sh"
     """
-    ssh = ctx.request_context.lifespan_context.ssh  # type: ignore[union-attr]
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
 
     try:
         local_file = pathlib.Path(local_path)
@@ -569,8 +819,7 @@ async def ssh_upload(
             _log_error(ctx, "ssh_upload", f"Local file not found: {local_path}")
             return f"Error: Local file not found: {local_path}"
 
-        async with ssh.start_sftp_client() as sftp:
-            await sftp.put(str(local_file), remote_path)
+        await run_sftp(app_ctx, lambda sftp: sftp.put(str(local_file), remote_path))
 
         _log_tool_call(
             ctx,
@@ -597,7 +846,7 @@ async def ssh_download(
     files must be transferred from inner layers using alternative methods.
 
     Notes:
-    - Uses SFTP over the persistent SSH connection
+    - Reuses a persistent SFTP session over the SSH connection
     - Automatically creates parent directories on host if needed
     - Use absolute paths for reliability
     - Supports all file types (text, binary, archives, logs)
@@ -619,15 +868,14 @@ async def ssh_download(
         - Download logs: remote_path="/var/log/app.log", local_path="./logs/app.log"
         - Download backup: remote_path="/home/vmrobot/backup.tar.gz", local_path="./backups/backup.tar.gz"
     """
-    ssh = ctx.request_context.lifespan_context.ssh  # type: ignore[union-attr]
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
 
     try:
         local_file = pathlib.Path(local_path)
         # Create parent directories if needed
         local_file.parent.mkdir(parents=True, exist_ok=True)
 
-        async with ssh.start_sftp_client() as sftp:
-            await sftp.get(remote_path, str(local_file))
+        await run_sftp(app_ctx, lambda sftp: sftp.get(remote_path, str(local_file)))
 
         _log_tool_call(
             ctx,
@@ -641,6 +889,131 @@ async def ssh_download(
         return f"Error downloading file: {str(e)}"
 
 
+def _format_transfers(
+    ctx: Context[ServerSession, AppContext] | None,
+    tool_name: str,
+    pairs: list[tuple[str, str]],
+    outcomes: list[object],
+) -> str:
+    """Summarise per-file transfer outcomes and log them."""
+    lines = []
+    for i, ((src, dst), outcome) in enumerate(zip(pairs, outcomes), 1):
+        if isinstance(outcome, BaseException):
+            lines.append(f"{i}. ERROR {src} -> {dst}: {str(outcome)}")
+            _log_error(ctx, tool_name, f"{src} -> {dst}: {str(outcome)}")
+        else:
+            lines.append(f"{i}. {src} -> {dst}")
+    succeeded = sum(1 for o in outcomes if not isinstance(o, BaseException))
+    summary = f"{succeeded}/{len(pairs)} files transferred"
+    _log_tool_call(ctx, tool_name, {"count": len(pairs)}, summary)
+    return f"{summary}:\n" + "\n".join(lines)
+
+
+def _check_transfers(
+    ctx: Context[ServerSession, AppContext] | None,
+    tool_name: str,
+    files: list[dict],
+    keys: tuple[str, str],
+) -> Optional[str]:
+    """Return an error report if any entry lacks a path, else None."""
+    lines = []
+    for i, f in enumerate(files, 1):
+        missing = [key for key in keys if not f.get(key)]
+        if missing:
+            lines.append(f"{i}. ERROR missing {'/'.join(missing)}")
+    if not lines:
+        return None
+    _log_error(ctx, tool_name, f"{len(lines)} entries missing paths")
+    return "No files transferred:\n" + "\n".join(lines)
+
+
+@mcp.tool()
+async def ssh_upload_many(
+    files: list[dict],
+    ctx: Context[ServerSession, AppContext] | None = None,
+) -> str:
+    """
+    Upload several files from the host to the VM concurrently via SFTP.
+
+    Each entry is a dict with "local_path" and "remote_path", as in ssh_upload.
+    Transfers share the persistent SFTP session and run in parallel (at most
+    SFTP_MAX_CONCURRENT at a time), which is much faster than separate
+    ssh_upload calls on high-latency links. A failed file does not stop the
+    others; an entry missing a path fails the whole call before any transfer.
+
+    Args:
+        files: List of {"local_path": ..., "remote_path": ...} dicts
+
+    Returns:
+        Per-file success/failure summary
+
+    Example:
+        [
+            {"local_path": "./a.sh", "remote_path": "/home/vmrobot/a.sh"},
+            {"local_path": "./b.conf", "remote_path": "/home/vmrobot/b.conf"}
+        ]
+    """
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
+    keys = ("local_path", "remote_path")
+    error = _check_transfers(ctx, "ssh_upload_many", files, keys)
+    if error is not None:
+        return error
+    pairs = [(f["local_path"], f["remote_path"]) for f in files]
+
+    async def upload(local_path: str, remote_path: str) -> None:
+        if not pathlib.Path(local_path).exists():
+            raise FileNotFoundError(f"Local file not found: {local_path}")
+        await run_sftp(app_ctx, lambda sftp: sftp.put(local_path, remote_path))
+
+    outcomes = await gather_limited(
+        [upload(src, dst) for src, dst in pairs], SFTP_MAX_CONCURRENT
+    )
+    return _format_transfers(ctx, "ssh_upload_many", pairs, outcomes)
+
+
+@mcp.tool()
+async def ssh_download_many(
+    files: list[dict],
+    ctx: Context[ServerSession, AppContext] | None = None,
+) -> str:
+    """
+    Download several files from the VM to the host concurrently via SFTP.
+
+    Each entry is a dict with "remote_path" and "local_path", as in ssh_download.
+    Parent directories on the host are created automatically. Transfers share
+    the persistent SFTP session and run in parallel (at most
+    SFTP_MAX_CONCURRENT at a time). A failed file does not stop the others; an
+    entry missing a path fails the whole call before any transfer.
+
+    Args:
+        files: List of {"remote_path": ..., "local_path": ...} dicts
+
+    Returns:
+        Per-file success/failure summary
+
+    Example:
+        [
+            {"remote_path": "/var/log/syslog", "local_path": "./logs/syslog"},
+            {"remote_path": "/var/log/Xorg.0.log", "local_path": "./logs/Xorg.0.log"}
+        ]
+    """
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
+    keys = ("remote_path", "local_path")
+    error = _check_transfers(ctx, "ssh_download_many", files, keys)
+    if error is not None:
+        return error
+    pairs = [(f["remote_path"], f["local_path"]) for f in files]
+
+    async def download(remote_path: str, local_path: str) -> None:
+        pathlib.Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+        await run_sftp(app_ctx, lambda sftp: sftp.get(remote_path, local_path))
+
+    outcomes = await gather_limited(
+        [download(src, dst) for src, dst in pairs], SFTP_MAX_CONCURRENT
+    )
+    return _format_transfers(ctx, "ssh_download_many", pairs, outcomes)
+
+
 @mcp.tool()
 async def ssh_connection_info(
     ctx: Context[ServerSession, AppContext] | None = None,
@@ -655,16 +1028,17 @@ async def ssh_connection_info(
     - Confirm which VM you're connected to
 
     The connection is persistent across all SSH tool calls, so no reconnect
-    overhead between operations.
+    overhead between operations. Keepalives detect a dead connection and it is
+    re-established automatically on the next command.
 
     Returns:
         Connection details including host, port, user, display, and connection status
     """
-    ssh = ctx.request_context.lifespan_context.ssh  # type: ignore[union-attr]
+    app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
 
     try:
         # Try to execute a simple command to verify connection is alive
-        await ssh.run("echo 'connection_test'", check=True, timeout=5)
+        await run_ssh(app_ctx, "echo 'connection_test'", check=True, timeout=5)
         status = "Connected"
     except Exception as e:
         status = f"Connection issue: {str(e)}"
@@ -710,25 +1084,22 @@ def _log_tool_call(
     result: str | None = None,
 ) -> None:
     """Log a tool call to the project log if a project is active."""
+    # Bail out before any formatting: without a project nothing is logged
     project = _get_project_optional(ctx)
     if project is None:
         return
 
     # Format parameters, truncating long values
-    param_strs = []
-    for k, v in params.items():
-        v_str = str(v)
-        if len(v_str) > 100:
-            v_str = v_str[:100] + "..."
-        param_strs.append(f"{k}={v_str}")
-    params_str = ", ".join(param_strs) if param_strs else ""
-
-    log_msg = f"TOOL: {tool_name}({params_str})"
+    params_str = ", ".join(f"{k}={_truncate(str(v), 100)}" for k, v in params.items())
     if result:
-        result_str = result if len(result) <= 200 else result[:200] + "..."
-        log_msg += f" -> {result_str}"
+        project._log(f"TOOL: {tool_name}({params_str}) -> {_truncate(result, 200)}")
+    else:
+        project._log(f"TOOL: {tool_name}({params_str})")
+
 
-    project._log(log_msg)
+def _truncate(text: str, limit: int) -> str:
+    """Cut text to limit characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else text[:limit] + "..."
 
 
 def _log_error(
@@ -774,10 +1145,13 @@ async def project_init(
     """
     app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
 
-    project = Project.create(name, description)
+    project = await asyncio.to_thread(Project.create, name, description)
+    if app_ctx.project is not None:
+        await app_ctx.project.close()
     app_ctx.project = project
+    project.start_log_writer()
 
-    info = project.get_info()
+    info = await asyncio.to_thread(project.get_info)
     return f"""Project initialized:
 Name: {info["name"]}
 Path: {info["path"]}
@@ -800,7 +1174,7 @@ async def project_info(
         Project details and statistics
     """
     project = _get_project(ctx)  # type: ignore[arg-type]
-    info = project.get_info()
+    info = await asyncio.to_thread(project.get_info)
 
     return f"""Project Information:
 Name: {info["name"]}
@@ -834,6 +1208,33 @@ async def project_log(
     return project.log(message, level)
 
 
+def _tail_lines(
+    path: pathlib.Path, count: int, contains: str = "", block_size: int = 8192
+) -> tuple[list[str], Optional[int]]:
+    """
+    Return the last count non-empty lines of a file that contain a substring.
+
+    The file is read backwards in blocks, so only the tail is loaded. The second
+    item is the total number of matching lines, or None if the start of the file
+    was not reached.
+    """
+    needle = contains.encode()
+    found: list[bytes] = []  # newest first
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        carry = b""  # start of the last line read, possibly incomplete
+        while pos > 0 and len(found) < count:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + carry).split(b"\n")
+            carry = lines.pop(0) if pos > 0 else b""
+            found.extend(line for line in reversed(lines) if line and needle in line)
+
+    total = len(found) if pos == 0 else None
+    return [line.decode() for line in reversed(found[:count])], total
+
+
 @mcp.tool()
 async def project_read_logs(
     lines: int = 50,
@@ -852,32 +1253,33 @@ async def project_read_logs(
     Use level_filter="ERROR" to see only errors.
 
     Args:
-        lines: Number of recent log lines to return (default 50)
+        lines: Number of recent log lines to return (default 50, at least 1)
         level_filter: Optional filter by level (INFO, WARNING, ERROR, DEBUG)
 
     Returns:
         Recent log entries
     """
+    if lines < 1:
+        return f"Error: lines must be at least 1, got {lines}"
+
     project = _get_project(ctx)  # type: ignore[arg-type]
+    await asyncio.to_thread(project.flush_logs)
     log_file = project.path / "logs" / "project.log"
 
     if not log_file.exists():
         return "No log entries yet."
 
-    all_lines = log_file.read_text().strip().split("\n")
-
-    if level_filter:
-        all_lines = [line for line in all_lines if f"[{level_filter.upper()}]" in line]
-
-    recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
+    needle = f"[{level_filter.upper()}]" if level_filter else ""
+    recent_lines, total = await asyncio.to_thread(_tail_lines, log_file, lines, needle)
 
     if not recent_lines:
         return f"No log entries found{' with level ' + level_filter if level_filter else ''}."
 
-    return (
-        f"Log entries ({len(recent_lines)} of {len(all_lines)} total):\n\n"
-        + "\n".join(recent_lines)
-    )
+    if total is None:  # tail stopped before reaching the start of the file
+        summary = f"last {len(recent_lines)}"
+    else:
+        summary = f"{len(recent_lines)} of {total} total"
+    return f"Log entries ({summary}):\n\n" + "\n".join(recent_lines)
 
 
 @mcp.tool()
@@ -897,7 +1299,7 @@ async def project_save_result(
         Path to saved file
     """
     project = _get_project(ctx)  # type: ignore[arg-type]
-    result_path = project.save_result(filename, content)
+    result_path = await asyncio.to_thread(project.save_result, filename, content)
     return f"Result saved to: {result_path}"
 
 
@@ -921,7 +1323,7 @@ async def project_save_advice(
         Confirmation with path to saved advice file
     """
     project = _get_project(ctx)  # type: ignore[arg-type]
-    advice_path = project.save_advice(title, content)
+    advice_path = await asyncio.to_thread(project.save_advice, title, content)
     return f"Advice saved: {title}\nPath: {advice_path}"
 
 
@@ -938,7 +1340,7 @@ async def project_read_advice(
         All saved advice entries formatted for reading
     """
     project = _get_project(ctx)  # type: ignore[arg-type]
-    advice_list = project.get_all_advice()
+    advice_list = await asyncio.to_thread(project.get_all_advice)
 
     if not advice_list:
         return "No advice saved for this project yet."
@@ -952,6 +1354,25 @@ async def project_read_advice(
     return output
 
 
+def _list_projects() -> list[str]:
+    """Describe every project folder with metadata, newest first."""
+    with os.scandir(PROJECTS_DIR) as it:
+        dirs = sorted((e for e in it if e.is_dir()), key=lambda e: e.name, reverse=True)
+
+    projects = []
+    for entry in dirs:
+        # Read metadata directly; building a full Project is not needed here
+        try:
+            with open(os.path.join(entry.path, "metadata.json"), "rb") as f:
+                data = _json_loads(f.read())
+            projects.append(f"- {data['name']} ({data['created_at']}): {entry.path}")
+        except FileNotFoundError:
+            continue
+        except Exception:
+            projects.append(f"- (invalid): {entry.path}")
+    return projects
+
+
 @mcp.tool()
 async def project_list(
     ctx: Context[ServerSession, AppContext] | None = None,
@@ -962,14 +1383,7 @@ async def project_list(
     Returns:
         List of projects with their paths and creation dates
     """
-    projects = []
-    for project_dir in sorted(PROJECTS_DIR.iterdir(), reverse=True):
-        if project_dir.is_dir() and (project_dir / "metadata.json").exists():
-            try:
-                proj = Project.load(project_dir)
-                projects.append(f"- {proj.name} ({proj.created_at}): {proj.path}")
-            except Exception:
-                projects.append(f"- (invalid): {project_dir}")
+    projects = await asyncio.to_thread(_list_projects)
 
     if not projects:
         return "No projects found."
@@ -1004,11 +1418,15 @@ async def project_load(
         return f"Error: Project path not found: {project_path}"
 
     try:
-        project = Project.load(path)
+        project = await asyncio.to_thread(Project.load, path)
+        if app_ctx.project is not None:
+            await app_ctx.project.close()
         app_ctx.project = project
+        project.start_log_writer()
         project._log("Project loaded")
+        await asyncio.to_thread(_index_screenshots, project)
 
-        info = project.get_info()
+        info = await asyncio.to_thread(project.get_info)
         output = f"""Project loaded:
 Name: {info["name"]}
 Path: {info["path"]}
@@ -1017,7 +1435,7 @@ Screenshots: {info["screenshot_count"]}
 Results: {info["result_count"]}"""
 
         # Include advice if any exists
-        advice_list = project.get_all_advice()
+        advice_list = await asyncio.to_thread(project.get_all_advice)
         if advice_list:
             output += f"\n\n## ⚠️ ADVICE FOR THIS PROJECT ({len(advice_list)} tips)\n"
             output += "Read these tips from previous sessions before proceeding:\n\n"
@@ -1036,6 +1454,29 @@ Results: {info["result_count"]}"""
 
 # ---------- Screenshot tools + resources ----------
 
+# scrot needs a .png filename to pick the format, so capture into a temp dir,
+# stream the file to stdout and remove the dir, all within a single SSH exec.
+# A fresh name in a new dir avoids scrot -o, which older scrot lacks.
+SCREENSHOT_CMD = (
+    f'd=$(mktemp -d) && DISPLAY={VM_DISPLAY} scrot "$d/s.png" && cat "$d/s.png"; '
+    'rc=$?; rm -rf "$d"; exit $rc'
+)
+
+# Screenshot id -> local file, filled as screenshots are taken or projects loaded
+_screenshot_index: dict[str, pathlib.Path] = {}
+
+
+def _index_screenshots(project: Project) -> None:
+    """Add all screenshots of a project to the lookup index."""
+    screenshots_dir = project.path / "screenshots"
+    try:
+        with os.scandir(screenshots_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".png"):
+                    _screenshot_index[entry.name[:-4]] = pathlib.Path(entry.path)
+    except FileNotFoundError:
+        pass
+
 
 @mcp.tool()
 async def take_screenshot(
@@ -1065,18 +1506,17 @@ async def take_screenshot(
     """
     app_ctx = ctx.request_context.lifespan_context  # type: ignore[union-attr]
     project = _get_project(ctx)  # type: ignore[arg-type]
-    ssh = app_ctx.ssh
 
-    sid = dt.datetime.utcnow().strftime("%Y%m%d-%H%M%S-%f")
-    remote_path = f"/tmp/mcp-screenshot-{sid}.png"
-    cmd = f'DISPLAY={VM_DISPLAY} scrot "{remote_path}"'
-    await run_vm_cmd(ssh, cmd)
+    # Screenshot id in "%Y%m%d-%H%M%S-%f" layout (UTC, microseconds)
+    sec, ns = divmod(time.time_ns(), 1_000_000_000)
+    sid = f"{_utc_timestamp('%Y%m%d-%H%M%S', sec)}-{ns // 1000:06d}"
+    # PNG bytes come back on the exec channel's stdout (binary, no decoding)
+    result = await run_ssh(app_ctx, SCREENSHOT_CMD, check=True, encoding=None)
 
-    # download via SFTP to project folder
     local_path = project.screenshot_path(sid)
-    async with ssh.start_sftp_client() as sftp:
-        await sftp.get(remote_path, str(local_path))
+    await asyncio.to_thread(local_path.write_bytes, result.stdout)
 
+    _screenshot_index[sid] = local_path
     project._log(f"Screenshot captured: {sid}")
     resource_uri = f"vm://screenshot/{sid}"
     return f"Screenshot captured: {local_path}\nResource URI: {resource_uri}"
@@ -1089,12 +1529,18 @@ async def get_screenshot(sid: str) -> bytes:
     Return a screenshot by ID as binary data.
     Searches in all project folders.
     """
-    # Search in all projects for this screenshot
-    for project_dir in PROJECTS_DIR.iterdir():
-        if project_dir.is_dir():
-            screenshot_path = project_dir / "screenshots" / f"{sid}.png"
-            if screenshot_path.exists():
-                return screenshot_path.read_bytes()
+    screenshot_path = _screenshot_index.get(sid)
+    if screenshot_path is not None and screenshot_path.exists():
+        return await asyncio.to_thread(screenshot_path.read_bytes)
+
+    # Not indexed yet (e.g. taken in an earlier session): search all projects
+    with os.scandir(PROJECTS_DIR) as it:
+        for entry in it:
+            if entry.is_dir():
+                screenshot_path = pathlib.Path(entry.path, "screenshots", f"{sid}.png")
+                if screenshot_path.exists():
+                    _screenshot_index[sid] = screenshot_path
+                    return await asyncio.to_thread(screenshot_path.read_bytes)
 
     raise FileNotFoundError(f"No screenshot found for id {sid}")
 
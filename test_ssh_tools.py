@@ -1,103 +1,319 @@
 #!/usr/bin/env python3
 """
 Simple test script for SSH tools in the MCP QEMU VM server.
+
+All tests share one SSH connection (CONN), so the handshake is paid once per
+run; only the reconnect test opens a connection of its own, since it closes
+it. The tests run concurrently and each opens its own channels on that
+connection - the multiplexing OpenSSH's ControlMaster provides. asyncssh does
+not use OpenSSH control sockets, so ssh_config ControlMaster settings have no
+effect.
 """
 
 import asyncio
+import io
 import os
-from typing import Any
+import socket
+import sys
+import tempfile
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, TextIO
+
+import asyncssh
+
+from server import (
+    VM_HOST,
+    VM_PORT,
+    VM_USER,
+    AppContext,
+    connect_ssh,
+    run_vm_cmd,
+    ssh_download,
+    ssh_execute,
+    ssh_upload,
+)
+
+# Header printed before the tests; config is read once, by server at import
+_BANNER = f"""{"=" * 60}
+MCP QEMU VM - SSH Tools Test Suite
+{"=" * 60}
+
+Configuration:
+  VM_HOST: {VM_HOST}
+  VM_USER: {VM_USER}
+  VM_PORT: {VM_PORT}
+"""
+
+
+def _preload_options() -> asyncssh.SSHClientConnectionOptions:
+    """Build client options at import, before the event loop starts.
+
+    Options are resolved for the VM's host and port, with ssh_config loaded
+    (config=()), so the keys found are the ones ssh_config's IdentityFile
+    picks for the VM, or the ~/.ssh/id_* defaults. asyncssh.connect()
+    re-prepares the options it is given: rebuilding them with those keys pinned
+    and a loaded config means connects neither reload keys nor re-parse
+    ssh_config. VM_IDENTITY, when set, still overrides the keys in connect_ssh.
+    """
+    kwargs = dict(
+        host=VM_HOST, port=VM_PORT, username=VM_USER, known_hosts=None, config=()
+    )
+    options = asyncssh.SSHClientConnectionOptions(**kwargs)
+    if options.client_keys:
+        options = asyncssh.SSHClientConnectionOptions(
+            client_keys=options.client_keys, **kwargs
+        )
+    return options
+
+
+_PRELOAD = _preload_options()
+
+# ASCII record separator, printed between the outputs of batched commands
+RS = "\x1e"
+
 
-from server import connect_ssh, ssh_execute
+async def batch_exec(ssh: Any, cmds: list[str]) -> list[tuple[int, str]]:
+    """Run several commands in one SSH exec; return (exit status, stdout) for each."""
+    script = "; ".join(f"({cmd}); printf '\\036%s\\036' $?" for cmd in cmds)
+    result = await ssh.run(script, check=True)
+    parts = result.stdout.split(RS)
+    return [(int(parts[i + 1]), parts[i].strip()) for i in range(0, 2 * len(cmds), 2)]
 
 
+class SharedSSH:
+    """Opens one SSH connection on first use and hands it to every caller."""
+
+    def __init__(self):
+        self._ssh: Any = None
+        self._lock = asyncio.Lock()  # concurrent first callers share one handshake
+
+    async def _get(self) -> Any:
+        async with self._lock:
+            if self._ssh is None or self._ssh.is_closed():
+                self._ssh = await connect_ssh(_PRELOAD)
+            return self._ssh
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """Use the shared connection for the duration of the block.
+
+        The connection is not held exclusively: concurrent callers each open
+        their own channels on it.
+        """
+        yield await self._get()
+
+    async def close(self) -> None:
+        """Close the shared connection, if open."""
+        if self._ssh is not None:
+            ssh, self._ssh = self._ssh, None
+            ssh.close()
+            await ssh.wait_closed()
+
+
+CONN = SharedSSH()
+
+
+@dataclass
 class MockAppContext:
-    """Mock context for testing."""
+    """Mock lifespan context for testing."""
+
+    ssh: Any
+    sftp: Any = None
+    project: Any = None  # no active project: tool calls are not logged
+
+
+@dataclass
+class MockRequest:
+    lifespan_context: MockAppContext
+
 
-    def __init__(self, ssh: Any):
-        self.ssh = ssh
+@dataclass
+class MockContext:
+    request_context: MockRequest
 
 
-async def test_connection():
+def mock_context(ssh: Any, sftp: Any = None) -> MockContext:
+    """Build the ctx object tools expect around an SSH connection."""
+    return MockContext(MockRequest(MockAppContext(ssh, sftp)))
+
+
+async def test_connection(out: TextIO = sys.stdout):
     """Test basic SSH connectivity"""
-    print("Testing SSH connection...")
+    print("Testing SSH connection...", file=out)
     try:
-        ssh = await connect_ssh()
-        print("✓ Successfully connected to VM")
+        # Run all probes in a single exec
+        probes = ["uname -a", "whoami", "hostname"]
+        async with CONN.acquire() as ssh:
+            outputs = await batch_exec(ssh, probes)
+        ok = True
+        for cmd, (status, output) in zip(probes, outputs):
+            if status == 0:
+                print(f"✓ {cmd}: {output}", file=out)
+            else:
+                print(f"✗ {cmd}: exit code {status}", file=out)
+                ok = False
+        return ok
+    except Exception as e:
+        print(f"✗ Connection failed: {e}", file=out)
+        return False
 
-        # Test basic command
-        result = await ssh.run("uname -a", check=True)
-        print(f"✓ VM Info: {result.stdout.strip()}")
 
-        ssh.close()
-        await ssh.wait_closed()
-        return True
+async def test_tcp_nodelay(out: TextIO = sys.stdout):
+    """Test that Nagle's algorithm is off on the SSH socket"""
+    print("\nTesting TCP_NODELAY...", file=out)
+    try:
+        # asyncio sets TCP_NODELAY on TCP transports; catch it being lost
+        async with CONN.acquire() as ssh:
+            sock = ssh.get_extra_info("socket")
+            nodelay = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        if nodelay:
+            print("✓ TCP_NODELAY is set", file=out)
+            return True
+        print("✗ TCP_NODELAY is not set", file=out)
+        return False
     except Exception as e:
-        print(f"✗ Connection failed: {e}")
+        print(f"✗ Test failed: {e}", file=out)
         return False
 
 
-async def test_ssh_execute():
+async def test_ssh_execute(out: TextIO = sys.stdout):
     """Test ssh_execute tool"""
-    print("\nTesting ssh_execute tool...")
+    print("\nTesting ssh_execute tool...", file=out)
     try:
-        ssh = await connect_ssh()
+        # Test execution
+        async with CONN.acquire() as ssh:
+            result = await ssh_execute("whoami", ctx=mock_context(ssh))
+        print(f"✓ Command output:\n{result}", file=out)
+        return True
+    except Exception as e:
+        print(f"✗ Test failed: {e}", file=out)
+        return False
 
-        # Create mock context
-        class MockRequest:
-            class MockLifespan:
-                def __init__(self, ssh):
-                    self.ssh = ssh
 
-            def __init__(self, ssh):
-                self.lifespan_context = self.MockLifespan(ssh)
+async def test_ssh_upload_download(out: TextIO = sys.stdout):
+    """Test ssh_upload and ssh_download tools with a round trip"""
+    print("\nTesting ssh_upload/ssh_download tools...", file=out)
+    payload = os.urandom(256 * 1024)  # several SFTP blocks, so writes are pipelined
+    try:
+        # Cleanup runs in reverse on every path: local temp dir, SFTP session,
+        # then the remote file
+        async with AsyncExitStack() as stack:
+            ssh = await stack.enter_async_context(CONN.acquire())
+            remote = (await ssh.run("mktemp", check=True)).stdout.strip()
+            stack.push_async_callback(ssh.run, f"rm -f {remote}")
+            sftp = await stack.enter_async_context(ssh.start_sftp_client())
+            tmp = stack.enter_context(tempfile.TemporaryDirectory())
 
-        class MockContext:
-            def __init__(self, ssh):
-                self.request_context = MockRequest(ssh)
+            ctx = mock_context(ssh, sftp)
+            src = os.path.join(tmp, "upload.bin")
+            dst = os.path.join(tmp, "download.bin")
+            with open(src, "wb") as f:
+                f.write(payload)
+            print(f"  {await ssh_upload(src, remote, ctx=ctx)}", file=out)
+            print(f"  {await ssh_download(remote, dst, ctx=ctx)}", file=out)
+            with open(dst, "rb") as f:
+                ok = f.read() == payload
+        if ok:
+            print(f"✓ Round trip of {len(payload)} bytes matches", file=out)
+        else:
+            print("✗ Downloaded file differs from upload", file=out)
+        return ok
+    except Exception as e:
+        print(f"✗ Test failed: {e}", file=out)
+        return False
 
-        ctx = MockContext(ssh)
 
-        # Test execution
-        result = await ssh_execute("whoami", ctx=ctx)
-        print(f"✓ Command output:\n{result}")
+async def test_sftp_reconnect(out: TextIO = sys.stdout):
+    """Test that ssh_upload recovers after the SSH connection was closed"""
+    print("\nTesting SFTP recovery after disconnect...", file=out)
+    try:
+        # A connection of its own, since closing CONN would break other tests
+        ssh = await connect_ssh(_PRELOAD)
+        app_ctx = AppContext(ssh=ssh, sftp=await ssh.start_sftp_client())
+        ctx = MockContext(MockRequest(app_ctx))
+        async with AsyncExitStack() as stack:
+            stack.callback(lambda: app_ctx.ssh.close())  # the reconnected one
+            remote = await run_vm_cmd(app_ctx, "mktemp")
+            stack.push_async_callback(run_vm_cmd, app_ctx, f"rm -f {remote}")
+            tmp = stack.enter_context(tempfile.TemporaryDirectory())
+            src = os.path.join(tmp, "upload.txt")
+            with open(src, "w") as f:
+                f.write("reconnect\n")
 
-        ssh.close()
-        await ssh.wait_closed()
-        return True
+            ssh.close()
+            await ssh.wait_closed()
+            result = await ssh_upload(src, remote, ctx=ctx)
+        print(f"  {result}", file=out)
+        if result.startswith("Successfully") and app_ctx.ssh is not ssh:
+            print("✓ Upload reconnected and succeeded", file=out)
+            return True
+        print("✗ Upload did not recover", file=out)
+        return False
     except Exception as e:
-        print(f"✗ Test failed: {e}")
+        print(f"✗ Test failed: {e}", file=out)
         return False
 
 
+TESTS = [
+    test_connection,
+    test_tcp_nodelay,
+    test_ssh_execute,
+    test_ssh_upload_download,
+    test_sftp_reconnect,
+]
+
+
 async def main():
-    print("=" * 60)
-    print("MCP QEMU VM - SSH Tools Test Suite")
-    print("=" * 60)
-    print("\nConfiguration:")
-    print(f"  VM_HOST: {os.getenv('VM_HOST', '192.168.122.79')}")
-    print(f"  VM_USER: {os.getenv('VM_USER', 'vmrobot')}")
-    print(f"  VM_PORT: {os.getenv('VM_PORT', '22')}")
-    print()
+    # The report is buffered and written in one go at the end
+    out = io.StringIO()
+    try:
+        return await run_tests(out)
+    finally:
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
+
+
+async def run_tests(out: io.StringIO) -> int:
+    print(_BANNER, file=out)
+
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(CONN.close)
+
+        # Open the shared connection up front to fail fast
+        try:
+            async with CONN.acquire():
+                print("✓ Successfully connected to VM\n", file=out)
+        except Exception as e:
+            print(f"✗ Connection failed: {e}", file=out)
+            return 1
 
-    results = []
+        if sys.stdout.isatty():
+            print(f"Running {len(TESTS)} tests...", flush=True)
 
-    # Run tests
-    results.append(await test_connection())
-    results.append(await test_ssh_execute())
+        # Run tests concurrently so their network round-trips overlap; each
+        # gets its own buffer so their output does not interleave
+        buffers = [io.StringIO() for _ in TESTS]
+        results = await asyncio.gather(
+            *(test(buf) for test, buf in zip(TESTS, buffers))
+        )
+        for buf in buffers:
+            out.write(buf.getvalue())
 
     # Summary
-    print("\n" + "=" * 60)
-    print("Test Summary")
-    print("=" * 60)
-    passed = sum(results)
+    print("\n" + "=" * 60, file=out)
+    print("Test Summary", file=out)
+    print("=" * 60, file=out)
+    passed = results.count(True)
     total = len(results)
-    print(f"Passed: {passed}/{total}")
+    print(f"Passed: {passed}/{total}", file=out)
 
     if passed == total:
-        print("✓ All tests passed!")
+        print("✓ All tests passed!", file=out)
         return 0
     else:
-        print("✗ Some tests failed")
+        print("✗ Some tests failed", file=out)
         return 1
 
 